@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 """
 Hybrid server (UDP video/audio + TCP general) updated for multi-user video tiles.
-Video UDP packets carry fragmented pickled payloads {'username':..., 'frame': b'...'}.
+Video UDP packets carry fragmented binary payloads: a fixed 36-byte header
+(32-byte padded username + u32 jpeg length) followed by raw JPEG bytes. The
+server never parses the payload — it reassembles and forwards it opaquely.
 """
 
-import socket, threading, pickle, logging, struct, time
+import socket, threading, json, logging, struct, time, os, collections, queue, errno, itertools
+from concurrent.futures import ThreadPoolExecutor
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 
@@ -15,8 +18,12 @@ GENERAL_TCP_PORT = 50002
 
 VIDEO_HDR_FMT = ">IHH"
 VIDEO_HDR_SIZE = struct.calcsize(VIDEO_HDR_FMT)
-MAX_UDP_PAYLOAD = 60000
+# cached Struct objects skip format-string parsing in the hot paths
+_VHDR = struct.Struct(VIDEO_HDR_FMT)
+_LEN = struct.Struct(">L")
+MAX_UDP_PAYLOAD = 1400   # fragment payload sized under path MTU
 AUDIO_UDP_MAX = 4096
+FILE_CHUNK = 65536
 FRAME_TTL = 2.0
 
 # shared state
@@ -25,47 +32,277 @@ meet_general_clients = {}    # meet_id -> [ (conn, addr, username) ... ]
 meet_video_addrs = {}        # meet_id -> set( (ip,port) )
 meet_audio_addrs = {}        # meet_id -> set( (ip,port) )
 udp_to_meet = {}             # (ip,port) -> meet_id
+ip_to_meet = {}              # ip -> meet_id (fallback when the port doesn't match)
+meet_video_peers_snapshot = {}   # meet_id -> tuple( (ip,port) ); rebuilt on join/leave
+
+meet_audio_peers_snapshot = {}   # meet_id -> tuple( (ip,port) ); rebuilt on join/leave
+
+def rebuild_video_snapshot(meet_id):
+    # caller holds dict_lock; the forward path reads the tuple without it
+    s = meet_video_addrs.get(meet_id)
+    if s:
+        meet_video_peers_snapshot[meet_id] = tuple(s)
+    else:
+        meet_video_peers_snapshot.pop(meet_id, None)
+
+def rebuild_audio_snapshot(meet_id):
+    # caller holds dict_lock; the audio relay reads the tuple without it
+    s = meet_audio_addrs.get(meet_id)
+    if s:
+        meet_audio_peers_snapshot[meet_id] = tuple(s)
+    else:
+        meet_audio_peers_snapshot.pop(meet_id, None)
 udp_to_user = {}             # (ip,port) -> username
 
-# reassembly for incoming UDP fragments (payloads are pickled payloads)
+# outgoing frame ids: a C-level counter is atomic under the GIL and, unlike
+# wall-clock milliseconds, can't collide when two frames complete in the same ms
+_frame_id_counter = itertools.count()
+
+# reassembly for incoming UDP fragments (payloads are opaque binary frames)
 reassembly_lock = threading.Lock()
-video_reassembly = {}   # key: (sender_addr, frame_id) -> {'parts':{idx:bytes}, 'total':int, 'ts':float}
+video_reassembly = {}   # key: sender_addr -> {'frame_id':int, 'buf':bytearray slab, 'got':bitmap, 'full':completion mask, 'total':int, 'stride':int, 'last_len':int, 'tail':(idx, bytes)|None, 'ts':float}; newest frame per sender wins
+
+SLAB_SIZE = 256 * 1024
+MAX_FRAME_BYTES = 4 * SLAB_SIZE   # no legit frame comes near this; larger claims are bogus
+
+class SlabPool:
+    """Bounded pool of fixed-size bytearray slabs reused across frames,
+    so steady-state reassembly allocates nothing per frame."""
+    def __init__(self, size, cap):
+        self.size = size
+        self.cap = cap
+        self._lock = threading.Lock()
+        self._slabs = collections.deque()
+
+    def acquire(self, need):
+        if need > self.size:
+            # oversized frame: one-off allocation, never pooled
+            return bytearray(need)
+        with self._lock:
+            if self._slabs:
+                return self._slabs.pop()
+        return bytearray(self.size)
+
+    def release(self, buf):
+        if len(buf) != self.size:
+            return
+        with self._lock:
+            if len(self._slabs) < self.cap:
+                self._slabs.append(buf)
+
+# sized for roughly participants x 2 concurrent in-flight frames
+slab_pool = SlabPool(SLAB_SIZE, cap=16)
 
 running = True
 
+# sendmmsg(2) batching: forwarding pays one syscall per fragment per peer
+# otherwise, which dominates server CPU as meetings grow
+try:
+    import ctypes
+    _libc = ctypes.CDLL(None, use_errno=True)
+    _libc.sendmmsg
+    _HAS_SENDMMSG = True
+except (OSError, AttributeError):
+    _HAS_SENDMMSG = False
+
+if _HAS_SENDMMSG:
+    class _iovec(ctypes.Structure):
+        _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+    class _sockaddr_in(ctypes.Structure):
+        _fields_ = [('sin_family', ctypes.c_ushort), ('sin_port', ctypes.c_uint16),
+                    ('sin_addr', ctypes.c_uint32), ('sin_zero', ctypes.c_char * 8)]
+    class _msghdr(ctypes.Structure):
+        _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint),
+                    ('msg_iov', ctypes.POINTER(_iovec)), ('msg_iovlen', ctypes.c_size_t),
+                    ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+                    ('msg_flags', ctypes.c_int)]
+    class _mmsghdr(ctypes.Structure):
+        _fields_ = [('msg_hdr', _msghdr), ('msg_len', ctypes.c_uint)]
+
+    _MMSG_BATCH = 64       # diminishing returns past ~64/flush
+    _IOV_PER_MSG = 4       # header + payload gather fits well within this
+
+    class _SendBatchState(threading.local):
+        """Per-thread mmsghdr/iovec/sockaddr arrays reused across flushes so
+        steady-state sending builds no ctypes objects."""
+        def __init__(self):
+            self.msgs = (_mmsghdr * _MMSG_BATCH)()
+            self.iovs = (_iovec * (_MMSG_BATCH * _IOV_PER_MSG))()
+            self.addrs = (_sockaddr_in * _MMSG_BATCH)()
+            for i in range(_MMSG_BATCH):
+                m = self.msgs[i].msg_hdr
+                m.msg_name = ctypes.addressof(self.addrs[i])
+                m.msg_namelen = ctypes.sizeof(_sockaddr_in)
+
+    _send_state = _SendBatchState()
+
+_HAS_RECVMMSG = False
+if _HAS_SENDMMSG:
+    try:
+        _libc.recvmmsg
+        _HAS_RECVMMSG = True
+    except AttributeError:
+        pass
+MSG_WAITFORONE = 0x10000   # recvmmsg: return once at least one datagram is in
+_HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')   # Unix-only, like recvmsg
+
+def _buf_address(buf):
+    # pointer to the start of a buffer's data (kept alive by the caller)
+    if isinstance(buf, bytes):
+        return ctypes.cast(ctypes.c_char_p(buf), ctypes.c_void_p).value
+    return ctypes.addressof((ctypes.c_char * len(buf)).from_buffer(buf))
+
+def _sendmmsg_batch(sock, pkts):
+    fd = sock.fileno()
+    st = _send_state
+    for base in range(0, len(pkts), _MMSG_BATCH):
+        chunk = pkts[base:base+_MMSG_BATCH]
+        cnt = len(chunk)
+        iov_next = 0
+        for i, (bufs, addr) in enumerate(chunk):
+            sa = st.addrs[i]
+            sa.sin_family = socket.AF_INET
+            sa.sin_port = socket.htons(addr[1])
+            sa.sin_addr = struct.unpack("=I", socket.inet_aton(addr[0]))[0]
+            nbuf = len(bufs)
+            if iov_next + nbuf > len(st.iovs):
+                raise OSError(errno.EMSGSIZE, "iovec budget exceeded")
+            for j, b in enumerate(bufs):
+                st.iovs[iov_next + j].iov_base = _buf_address(b)
+                st.iovs[iov_next + j].iov_len = len(b)
+            m = st.msgs[i].msg_hdr
+            m.msg_iov = ctypes.pointer(st.iovs[iov_next]); m.msg_iovlen = nbuf
+            iov_next += nbuf
+        sent = 0
+        while sent < cnt:
+            n = _libc.sendmmsg(fd, ctypes.byref(st.msgs, sent*ctypes.sizeof(_mmsghdr)), cnt - sent, 0)
+            if n < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, os.strerror(err))
+            sent += n
+
+# UDP GSO: hand the kernel one buffer holding many equal-size fragments and a
+# UDP_SEGMENT cmsg; the stack segments it once instead of traversing per packet
+UDP_SEGMENT = getattr(socket, 'UDP_SEGMENT', 103)
+_gso_supported = None
+
+def gso_available(sock):
+    global _gso_supported
+    if _gso_supported is None:
+        try:
+            sock.setsockopt(socket.IPPROTO_UDP, UDP_SEGMENT, 0)
+            _gso_supported = True
+        except OSError:
+            _gso_supported = False
+    return _gso_supported
+
+class BatchReceiver:
+    """Pulls up to `vlen` datagrams per recvmmsg(2) syscall into preallocated
+    slots; degrades to one recvfrom per call where recvmmsg is unavailable."""
+
+    def __init__(self, sock, slot_size, vlen=64):
+        self.sock = sock
+        self.slot_size = slot_size
+        self.vlen = vlen
+        self._use_mmsg = _HAS_RECVMMSG
+        if self._use_mmsg:
+            self._bufs = [bytearray(slot_size) for _ in range(vlen)]
+            self._views = [(ctypes.c_char * slot_size).from_buffer(b) for b in self._bufs]
+            self._iovs = (_iovec * vlen)()
+            self._msgs = (_mmsghdr * vlen)()
+            self._addrs = (_sockaddr_in * vlen)()
+            for i in range(vlen):
+                self._iovs[i].iov_base = ctypes.addressof(self._views[i])
+                self._iovs[i].iov_len = slot_size
+                m = self._msgs[i].msg_hdr
+                m.msg_name = ctypes.addressof(self._addrs[i])
+                m.msg_namelen = ctypes.sizeof(_sockaddr_in)
+                m.msg_iov = ctypes.pointer(self._iovs[i])
+                m.msg_iovlen = 1
+
+    def recv_batch(self):
+        """Block for at least one datagram; returns [(payload_bytes, (ip, port))]."""
+        if self._use_mmsg:
+            n = _libc.recvmmsg(self.sock.fileno(), self._msgs, self.vlen, MSG_WAITFORONE, None)
+            if n < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, os.strerror(err))
+            out = []
+            for i in range(n):
+                ln = self._msgs[i].msg_len
+                sa = self._addrs[i]
+                sender = (socket.inet_ntoa(struct.pack("=I", sa.sin_addr)), socket.ntohs(sa.sin_port))
+                out.append((bytes(self._bufs[i][:ln]), sender))
+                self._msgs[i].msg_hdr.msg_namelen = ctypes.sizeof(_sockaddr_in)
+            return out
+        return [self.sock.recvfrom(self.slot_size)]
+
+def send_packet_batch(sock, pkts):
+    """Send a list of (buffer_list, addr) datagrams, each gathered from its
+    buffers by the kernel; batched via sendmmsg on Linux, a sendmsg loop
+    elsewhere."""
+    if _HAS_SENDMMSG:
+        try:
+            _sendmmsg_batch(sock, pkts)
+            return
+        except OSError:
+            pass
+    for bufs, addr in pkts:
+        try:
+            if _HAS_SENDMSG:
+                sock.sendmsg(bufs, (), 0, addr)
+            else:
+                sock.sendto(b''.join(bufs), addr)
+        except Exception:
+            pass
+
 def recv_exact(conn, n):
-    data = b''
-    while len(data) < n:
-        p = conn.recv(n - len(data))
-        if not p:
+    # single pre-sized buffer; bytes += reallocates quadratically for big reads
+    buf = bytearray(n)
+    mv = memoryview(buf)
+    off = 0
+    while off < n:
+        k = conn.recv_into(mv[off:])
+        if not k:
             return None
-        data += p
-    return data
+        off += k
+    return bytes(buf)
 
-def recv_pickle_prefixed(conn):
+def recv_json_prefixed(conn):
     hdr = recv_exact(conn, 4)
     if not hdr:
         return None
-    ln = struct.unpack(">L", hdr)[0]
+    ln = _LEN.unpack(hdr)[0]
     payload = recv_exact(conn, ln)
     if not payload:
         return None
-    return pickle.loads(payload)
+    return json.loads(payload.decode())
+
+def send_json_prefixed(conn, obj):
+    data = json.dumps(obj).encode()
+    conn.sendall(_LEN.pack(len(data)) + data)
 
-def send_pickle_prefixed(conn, obj):
-    data = pickle.dumps(obj)
-    conn.sendall(struct.pack(">L", len(data)) + data)
+# file relay fan-out: one worker per concurrent peer send
+file_fanout_pool = ThreadPoolExecutor(max_workers=8)
+
+def _relay_chunk(p_conn, chunk):
+    try:
+        p_conn.sendall(chunk)
+    except Exception:
+        pass
 
 def cleanup_old_reassembly():
     while running:
-        now = time.time()
+        now = time.monotonic()
         to_del = []
         with reassembly_lock:
             for k, v in list(video_reassembly.items()):
                 if now - v['ts'] > FRAME_TTL:
                     to_del.append(k)
             for k in to_del:
-                del video_reassembly[k]
+                buf = video_reassembly.pop(k)['buf']
+                if buf is not None:
+                    slab_pool.release(buf)
         time.sleep(1.0)
 
 # general TCP handler: handshake registers UDP ports and username
@@ -73,7 +310,7 @@ def handle_general(conn, addr):
     meet_id = None
     username = None
     try:
-        info = recv_pickle_prefixed(conn)
+        info = recv_json_prefixed(conn)
         if not info:
             logging.info(f"[general] bad handshake from {addr}")
             conn.close()
@@ -90,14 +327,19 @@ def handle_general(conn, addr):
                 meet_video_addrs.setdefault(meet_id, set()).add((client_ip, vid_port))
                 udp_to_meet[(client_ip, vid_port)] = meet_id
                 udp_to_user[(client_ip, vid_port)] = username
+                ip_to_meet[client_ip] = meet_id
+                rebuild_video_snapshot(meet_id)
             if aud_port:
                 meet_audio_addrs.setdefault(meet_id, set()).add((client_ip, aud_port))
+                udp_to_meet[(client_ip, aud_port)] = meet_id
+                ip_to_meet[client_ip] = meet_id
+                rebuild_audio_snapshot(meet_id)
 
         logging.info(f"[general] {username}@{meet_id} from {addr} registered UDP ports v:{vid_port} a:{aud_port}")
 
-        # relay pickled messages to peers
+        # relay JSON control messages to peers
         while running:
-            msg = recv_pickle_prefixed(conn)
+            msg = recv_json_prefixed(conn)
             if msg is None:
                 break
             with dict_lock:
@@ -105,25 +347,31 @@ def handle_general(conn, addr):
             for (p_conn, p_addr, p_user) in peers:
                 if p_addr != addr:
                     try:
-                        send_pickle_prefixed(p_conn, msg)
+                        send_json_prefixed(p_conn, msg)
                     except Exception:
                         pass
             # handle file data relay if msg is file header
             if msg.get('msg_type') == 'file':
                 size = msg.get('size', 0)
                 remaining = size
+                dests = [p_conn for (p_conn, p_addr, p_user) in peers if p_addr != addr]
                 while remaining > 0:
-                    chunk_size = min(1024, remaining)
+                    chunk_size = min(FILE_CHUNK, remaining)
                     chunk = recv_exact(conn, chunk_size)
                     if not chunk:
                         break
                     remaining -= len(chunk)
-                    for (p_conn, p_addr, p_user) in peers:
-                        if p_addr != addr:
-                            try:
-                                p_conn.sendall(chunk)
-                            except Exception:
-                                pass
+                    if len(dests) <= 1:
+                        for p_conn in dests:
+                            _relay_chunk(p_conn, chunk)
+                    else:
+                        # fan out in parallel so the slowest peer doesn't
+                        # gate the transfer; join before the next chunk to
+                        # keep per-peer byte order
+                        futs = [file_fanout_pool.submit(_relay_chunk, p_conn, chunk)
+                                for p_conn in dests]
+                        for f in futs:
+                            f.result()
     except Exception as e:
         logging.exception(f"[general] exception {addr}: {e}")
     finally:
@@ -140,99 +388,229 @@ def handle_general(conn, addr):
                         meet_video_addrs[meet_id] = to_keep
                     else:
                         del meet_video_addrs[meet_id]
+                    rebuild_video_snapshot(meet_id)
                 if meet_id in meet_audio_addrs:
                     to_keep = {a for a in meet_audio_addrs[meet_id] if a[0] != client_ip}
                     if to_keep:
                         meet_audio_addrs[meet_id] = to_keep
                     else:
                         del meet_audio_addrs[meet_id]
+                    rebuild_audio_snapshot(meet_id)
                 # remove reverse maps
                 for k in list(udp_to_meet.keys()):
                     if k[0] == client_ip:
                         udp_to_meet.pop(k, None)
                         udp_to_user.pop(k, None)
+                ip_to_meet.pop(client_ip, None)
         try:
             conn.close()
         except:
             pass
         logging.info(f"[general] {username}@{addr} disconnected")
 
-# video UDP listener: receives fragmented pickled payloads from clients, reassembles, and forwards
-def video_udp_listener(udp_sock):
+# video UDP listener: the receive thread only drains the socket and hands
+# packets to reassembly workers, so a slow forward can't back up the socket
+# buffer; sharding by sender keeps per-sender fragment ordering
+VIDEO_WORKERS = max((os.cpu_count() or 2) // 2, 1)
+VIDEO_RX_SOCKETS = max((os.cpu_count() or 2) // 2, 1)
+
+def reassembly_worker(udp_sock, q):
     while running:
+        pkt, sender, now = q.get()
         try:
-            pkt, sender = udp_sock.recvfrom(MAX_UDP_PAYLOAD + VIDEO_HDR_SIZE + 64)
-            if not pkt or len(pkt) < VIDEO_HDR_SIZE:
-                continue
-            hdr = pkt[:VIDEO_HDR_SIZE]
-            payload = pkt[VIDEO_HDR_SIZE:]
-            frame_id, total_parts, part_idx = struct.unpack(VIDEO_HDR_FMT, hdr)
-            key = (sender, frame_id)
-            with reassembly_lock:
-                entry = video_reassembly.get(key)
-                if not entry:
-                    entry = {'parts': {}, 'total': total_parts, 'ts': time.time()}
-                    video_reassembly[key] = entry
-                entry['parts'][part_idx] = payload
-                entry['ts'] = time.time()
-                if len(entry['parts']) == entry['total']:
-                    parts = [entry['parts'][i] for i in range(entry['total'])]
-                    payload_bytes = b''.join(parts)
-                    del video_reassembly[key]
-                    # determine meeting by sender address (exact ip+port mapping)
-                    meet = udp_to_meet.get(sender)
-                    if not meet:
-                        # try by ip only
-                        sender_ip = sender[0]
-                        with dict_lock:
-                            for mid, addrs in meet_video_addrs.items():
-                                if any(a[0] == sender_ip for a in addrs):
-                                    meet = mid
-                                    break
-                    if not meet:
-                        continue
-                    # forward the SAME payload_bytes (pickled) to other peers in meet
-                    with dict_lock:
-                        peers = set(meet_video_addrs.get(meet, set()))
-                    for peer in peers:
-                        if peer == sender:
-                            continue
-                        # fragment payload_bytes and send
-                        max_payload = MAX_UDP_PAYLOAD
-                        total = (len(payload_bytes) + max_payload - 1) // max_payload
-                        frame_id_out = int(time.time() * 1000) & 0xFFFFFFFF
-                        for idx in range(total):
-                            start = idx * max_payload
-                            part = payload_bytes[start:start + max_payload]
-                            hdr_out = struct.pack(VIDEO_HDR_FMT, frame_id_out, total, idx)
-                            try:
-                                udp_sock.sendto(hdr_out + part, peer)
-                            except Exception:
-                                pass
+            handle_video_packet(udp_sock, pkt, sender, now)
+        except Exception:
+            logging.exception("reassembly_worker exception")
+
+def start_reassembly_workers(udp_sock):
+    shards = [queue.SimpleQueue() for _ in range(VIDEO_WORKERS)]
+    for q in shards:
+        threading.Thread(target=reassembly_worker, args=(udp_sock, q), daemon=True).start()
+    return shards
+
+def tune_udp_socket(sock, bufsize):
+    """Grow kernel buffers (capped by net.core.rmem_max/wmem_max) and forbid
+    IP-level fragmentation; app fragments already fit the MTU."""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, bufsize)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, bufsize)
+    except OSError:
+        pass
+    if hasattr(socket, 'IP_MTU_DISCOVER') and hasattr(socket, 'IP_PMTUDISC_DO'):
+        try:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MTU_DISCOVER, socket.IP_PMTUDISC_DO)
+        except OSError:
+            pass
+
+def bind_video_sockets():
+    """Bind the video port on several SO_REUSEPORT sockets so the kernel
+    hashes sender flows across receive threads; one socket where the
+    option is unavailable."""
+    want = VIDEO_RX_SOCKETS if hasattr(socket, 'SO_REUSEPORT') else 1
+    socks = []
+    for _ in range(want):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if want > 1:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        tune_udp_socket(s, 16 * 1024 * 1024)
+        s.bind((SERVER_HOST, VIDEO_UDP_PORT))
+        socks.append(s)
+    return socks
+
+def video_udp_listener(udp_sock, shards):
+    rx = BatchReceiver(udp_sock, MAX_UDP_PAYLOAD + VIDEO_HDR_SIZE + 64)
+    while running:
+        try:
+            batch = rx.recv_batch()
+            # one clock read covers the whole batch
+            now = time.monotonic()
+            for pkt, sender in batch:
+                shards[hash(sender) % VIDEO_WORKERS].put((pkt, sender, now))
         except Exception:
             logging.exception("video_udp_listener exception")
 
+def handle_video_packet(udp_sock, pkt, sender, now=None):
+    if not pkt or len(pkt) < VIDEO_HDR_SIZE:
+        return
+    if now is None:
+        now = time.monotonic()
+    payload = pkt[VIDEO_HDR_SIZE:]
+    frame_id, total_parts, part_idx = _VHDR.unpack_from(pkt, 0)
+    if total_parts < 1 or part_idx >= total_parts:
+        return   # malformed header; never index a slab with it
+    with reassembly_lock:
+        entry = video_reassembly.get(sender)
+        if entry is not None and entry['frame_id'] != frame_id:
+            if (frame_id - entry['frame_id']) & 0xFFFFFFFF >= 0x80000000:
+                return   # reordered straggler of an older frame; keep the held one
+            # a newer frame from this sender supersedes the held one;
+            # recycle its slab rather than waiting for the TTL sweeper
+            if entry['buf'] is not None:
+                slab_pool.release(entry['buf'])
+            entry = None
+        if entry is None:
+            entry = {'frame_id': frame_id, 'buf': None, 'got': 0,
+                     'full': (1 << total_parts) - 1, 'total': total_parts,
+                     'stride': 0, 'last_len': 0, 'tail': None, 'ts': now}
+            video_reassembly[sender] = entry
+        entry['ts'] = now
+        if part_idx == total_parts - 1:
+            entry['last_len'] = len(payload)
+        if entry['buf'] is None:
+            if part_idx < total_parts - 1 or total_parts == 1:
+                # every non-final fragment has the same size; learn the
+                # stride from the first one and copy fragments straight
+                # into a single slab instead of a dict of bytes objects
+                entry['stride'] = len(payload)
+                need = total_parts * entry['stride']
+                if need > MAX_FRAME_BYTES:
+                    # the claimed size is header-controlled; drop the frame
+                    # rather than allocate whatever a spoofed packet asks for
+                    del video_reassembly[sender]
+                    return
+                entry['buf'] = slab_pool.acquire(need)
+                if entry['tail'] is not None:
+                    t_idx, t_payload = entry['tail']
+                    if len(t_payload) <= entry['stride']:
+                        t_start = t_idx * entry['stride']
+                        entry['buf'][t_start:t_start + len(t_payload)] = t_payload
+                        entry['got'] |= 1 << t_idx
+                    entry['tail'] = None
+            else:
+                # lone final fragment arrived first; slab size is unknown
+                # until a full-size fragment shows up
+                entry['tail'] = (part_idx, payload)
+                return
+        if len(payload) > entry['stride']:
+            return   # can't be a fragment of this frame; would overrun its slot
+        bit = 1 << part_idx
+        if entry['got'] & bit:
+            return   # duplicate fragment
+        start = part_idx * entry['stride']
+        entry['buf'][start:start + len(payload)] = payload
+        entry['got'] |= bit
+        if entry['got'] != entry['full']:
+            return
+        real_len = (entry['total'] - 1) * entry['stride'] + entry['last_len']
+        buf = entry['buf']
+        del video_reassembly[sender]
+    # entry is out of the dict now; forward without holding the lock,
+    # returning the slab to the pool once the forward loop is done
+    try:
+        # determine meeting by sender address (exact ip+port mapping,
+        # then by ip alone) -- both O(1) dict hits
+        meet = udp_to_meet.get(sender) or ip_to_meet.get(sender[0])
+        if not meet:
+            return
+        # forward the SAME reassembled bytes to other peers in meet,
+        # batching every fragment for every peer into sendmmsg flushes;
+        # the snapshot tuple is replaced atomically on join/leave, so no
+        # dict_lock is needed on the per-frame path
+        peers = meet_video_peers_snapshot.get(meet) or ()
+        max_payload = MAX_UDP_PAYLOAD
+        total = (real_len + max_payload - 1) // max_payload
+        frame_id_out = next(_frame_id_counter) & 0xFFFFFFFF
+        # headers are identical for every peer; build them once, and leave
+        # the payload in the slab so the kernel gathers it via iovecs
+        # instead of copying hdr + part into fresh bytes per fragment
+        hdrs = bytearray(total * VIDEO_HDR_SIZE)
+        hdrs_mv = memoryview(hdrs)
+        slab_mv = memoryview(buf)
+        iov = []
+        for idx in range(total):
+            off = idx * VIDEO_HDR_SIZE
+            _VHDR.pack_into(hdrs, off, frame_id_out, total, idx)
+            start = idx * max_payload
+            iov.append(hdrs_mv[off:off + VIDEO_HDR_SIZE])
+            iov.append(slab_mv[start:min(start + max_payload, real_len)])
+        dests = [p for p in peers if p != sender]
+        if not dests:
+            return
+        if total > 1 and gso_available(udp_sock):
+            # one sendmsg per ~64KB of fragments per peer; only the
+            # final segment of a send may be short, which matches
+            # how the frame fragments are laid out
+            seg = VIDEO_HDR_SIZE + max_payload
+            max_segs = max(65507 // seg, 1)
+            cmsg = [(socket.IPPROTO_UDP, UDP_SEGMENT, struct.pack('H', seg))]
+            for peer in dests:
+                for i in range(0, total, max_segs):
+                    try:
+                        udp_sock.sendmsg(iov[2*i:2*(i + max_segs)], cmsg, 0, peer)
+                    except Exception:
+                        pass
+        else:
+            send_packet_batch(udp_sock, [(iov[2*i:2*i + 2], peer)
+                                         for peer in dests for i in range(total)])
+    finally:
+        slab_pool.release(buf)
+
 # audio UDP: simple relay (raw PCM)
 def audio_udp_listener(udp_sock):
+    rx = BatchReceiver(udp_sock, AUDIO_UDP_MAX + 64)
     while running:
         try:
-            pkt, sender = udp_sock.recvfrom(AUDIO_UDP_MAX + 64)
-            if not pkt:
-                continue
-            sender_ip = sender[0]
-            with dict_lock:
-                for mid, addrs in meet_audio_addrs.items():
-                    if any(a[0] == sender_ip for a in addrs):
-                        peers = set(addrs)
-                        for peer in peers:
-                            if peer != sender:
-                                try:
-                                    udp_sock.sendto(pkt, peer)
-                                except:
-                                    pass
+            for pkt, sender in rx.recv_batch():
+                handle_audio_packet(udp_sock, pkt, sender)
         except Exception:
             logging.exception("audio_udp_listener exception")
 
+def handle_audio_packet(udp_sock, pkt, sender):
+    if not pkt:
+        return
+    # O(1) dispatch: exact (ip, port) mapping, then ip alone; the peer
+    # tuple is swapped atomically on join/leave, so no dict_lock here
+    meet = udp_to_meet.get(sender) or ip_to_meet.get(sender[0])
+    if not meet:
+        return
+    for peer in (meet_audio_peers_snapshot.get(meet) or ()):
+        if peer != sender:
+            try:
+                udp_sock.sendto(pkt, peer)
+            except:
+                pass
+
 def accept_general_tcp(tcp_sock):
     while running:
         try:
@@ -245,13 +623,12 @@ def accept_general_tcp(tcp_sock):
 def main():
     global running
     logging.info("Starting server...")
-    video_udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    video_udp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    video_udp.bind((SERVER_HOST, VIDEO_UDP_PORT))
-    logging.info(f"Video UDP bound {SERVER_HOST}:{VIDEO_UDP_PORT}")
+    video_socks = bind_video_sockets()
+    logging.info(f"Video UDP bound {SERVER_HOST}:{VIDEO_UDP_PORT} x{len(video_socks)}")
 
     audio_udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     audio_udp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    tune_udp_socket(audio_udp, 2 * 1024 * 1024)
     audio_udp.bind((SERVER_HOST, AUDIO_UDP_PORT))
     logging.info(f"Audio UDP bound {SERVER_HOST}:{AUDIO_UDP_PORT}")
 
@@ -262,7 +639,9 @@ def main():
     logging.info(f"General TCP listening {SERVER_HOST}:{GENERAL_TCP_PORT}")
 
     threading.Thread(target=cleanup_old_reassembly, daemon=True).start()
-    threading.Thread(target=video_udp_listener, args=(video_udp,), daemon=True).start()
+    shards = start_reassembly_workers(video_socks[0])
+    for s in video_socks:
+        threading.Thread(target=video_udp_listener, args=(s, shards), daemon=True).start()
     threading.Thread(target=audio_udp_listener, args=(audio_udp,), daemon=True).start()
     threading.Thread(target=accept_general_tcp, args=(general_tcp,), daemon=True).start()
 
@@ -275,7 +654,8 @@ def main():
         running = False
         try:
             general_tcp.close()
-            video_udp.close()
+            for s in video_socks:
+                s.close()
             audio_udp.close()
         except:
             pass